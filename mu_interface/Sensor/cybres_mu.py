@@ -1,31 +1,58 @@
 #!/usr/bin/env python3
 import enum
 import logging
+import os
 import re
+import select
 import time
 
 import serial
 
+# Key/value pairs in a status message: a single non-digit key followed by its
+# numeric value. Matches the hand-written parser: the last non-digit before a
+# run of digits is the key, keys without a value are skipped.
+_STATUS_RE = re.compile(r"(\D)(\d+)")
+
+# Command templates as bytes so building a command is a single C-level
+# format instead of a str.format plus encode round-trip.
+_MI_CMD = b",mi%05d*"
+_YA_CMD = b",ya%03d*"
+_YY_CMD = b",yy%d*"
+_Y1_CMD = b",y1%d*"
+_YN_CMD = b",yn%d*"
+
 
 class WatchdogCounter:
-    def __init__(self, timeout_multiplier, timeout_value):
+    def __init__(self, timeout_multiplier, timeout_value, target=r".+"):
         self.timeout_multiplier = timeout_multiplier
         self.timeout_value = timeout_value
         self.limit = 0
         self.update_limit(timeout_value)
         self.last_valid = None
         self.last_report = 0
-
-    def check(self, data, target):
+        # Literal targets are checked with plain equality, which is an order of
+        # magnitude cheaper than the regex engine on the per-byte path. Only
+        # patterns with actual metacharacters go through re (compiled once).
+        if target == re.escape(target):
+            self._match = target.__eq__
+        else:
+            self._match = re.compile(target).match
+
+    def check(self, data):
+        # Read the clock once per invocation. monotonic is immune to system
+        # clock jumps which would otherwise fire the watchdog spuriously.
+        now = time.monotonic()
 
         if self.last_valid is None:
-            self.last_valid = time.time()
+            self.last_valid = now
 
-        # Compare received data with target data using regex
-        if re.match(target, data):
-            self.last_valid = time.time()
+        # Compare received data with the target. On a match nothing is late,
+        # so skip the delay math entirely (the common steady-state path).
+        if self._match(data):
+            self.last_valid = now
+            return True, 0.0, False
 
-        delay = time.time() - self.last_valid
+        delay = now - self.last_valid
         relative_delay = round(delay / self.timeout_value, 1)
 
         if delay >= self.limit:
@@ -94,8 +121,8 @@ class Cybres_MU:
             dsrdtr=False,
         )
 
-        self.data_watchdog = WatchdogCounter(3, 10)
-        self.frame_watchdog = WatchdogCounter(3, 10)
+        self.data_watchdog = WatchdogCounter(3, 10, target=r".+")
+        self.frame_watchdog = WatchdogCounter(3, 10, target=r"[AZ]")
 
         self.ser.port = port_name
         self.ser.rts = True
@@ -115,49 +142,109 @@ class Cybres_MU:
 
         self.start_char = "Z"
 
+        # pyserial's read_until still fetches one byte per syscall internally,
+        # so we read in bulk straight from the fd where possible (Linux) and
+        # keep leftover bytes in a buffer between calls.
+        self._rx_buf = bytearray()
+        # Reused for frame assembly in get_next so a long-running process
+        # does not allocate and free a fresh buffer for every frame.
+        self._frame_buf = bytearray()
+        try:
+            self._fd = self.ser.fileno()
+        except (OSError, NotImplementedError):
+            self._fd = None
+
+    def _read_until(self, expected):
+        """
+        Read up to and including the expected byte, or until timeout.
+
+        Uses select + bulk os.read so a whole frame costs a handful of
+        syscalls instead of one per byte. Falls back to pyserial's own
+        read_until when the port has no usable file descriptor.
+        """
+        if self._fd is None:
+            return self.ser.read_until(expected)
+
+        buf = self._rx_buf
+        idx = buf.find(expected)
+        if idx < 0:
+            deadline = time.monotonic() + self.timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                ready, _, _ = select.select([self._fd], [], [], remaining)
+                if not ready:
+                    break
+                chunk = os.read(self._fd, 4096)
+                if not chunk:
+                    break
+                search_from = max(0, len(buf) - len(expected) + 1)
+                buf += chunk
+                idx = buf.find(expected, search_from)
+                if idx >= 0:
+                    break
+
+        if idx < 0:
+            idx = len(buf) - 1
+        data = bytes(buf[:idx + 1])
+        del buf[:idx + 1]
+        return data
+
     # Finds the start of the next data set
     def find_start(self):
         start_found = False
-        debug_buffer = ""
+        debug_buffer = []
+        # Hoist the bound methods out of the loop to skip the attribute
+        # lookups on every iteration.
+        read_until = self._read_until
+        data_check = self.data_watchdog.check
+        frame_check = self.frame_watchdog.check
         while not start_found:
-            # If serial buffer is empty, read will return an empty string after timeout.
-            char = self.ser.read(1).decode("ascii")
-            debug_buffer += char
+            # Bulk read up to and including the next start char. On timeout,
+            # read_until returns whatever arrived so far (possibly nothing).
+            chunk = read_until(b"A").decode("ascii")
+            debug_buffer.append(chunk)
 
             # Check that we are receiving something.
-            ok, delay, warn = self.data_watchdog.check(char, r".+")
+            ok, delay, warn = data_check(chunk)
             if warn:
                 logging.error(f"Nothing received from Blue box {delay} times longer than expected.")
-            ok, delay, warn = self.frame_watchdog.check(char, r"A")
+            ok, delay, warn = frame_check(chunk[-1:])
             if warn:
                 logging.error(f"Start char not found {delay} times longer than expected.")
-                logging.debug(f"Current buffer state {debug_buffer}")
+                logging.debug(f"Current buffer state {''.join(debug_buffer)}")
 
             if not ok and delay > 10 and warn:
                 raise TimeoutError("No data received from Blue box.")
 
-            if char == "A":
+            if chunk.endswith("A"):
                 start_found = True
-                debug_buffer = ""
-        self.start_char = char
+                debug_buffer = []
+        self.start_char = "A"
 
     # Returns the next complete data set
     def get_next(self):
-        line = ""
+        buffer = self._frame_buf
+        del buffer[:]
         end_found = False
         if self.start_char != "A":
             self.find_start()
+        read_until = self._read_until
+        frame_check = self.frame_watchdog.check
         while not end_found:
-            next_char = self.ser.read(1).decode("ascii")
-            ok, delay, warn = self.frame_watchdog.check(next_char, r"Z")
+            # Bulk read up to and including the end char instead of one byte
+            # at a time.
+            chunk = read_until(b"Z")
+            buffer += chunk
+            ok, delay, warn = frame_check(chunk[-1:].decode("ascii"))
             if warn:
                 logging.error(f"End char not found {delay} times longer than expected.")
-            if next_char == "Z":
+            if chunk.endswith(b"Z"):
                 end_found = True
-            else:
-                line += next_char
-            self.start_char = next_char
-        return line[:-1]
+        self.start_char = "Z"
+        # Strip the end char and the separator char preceding it.
+        return buffer[:-2].decode("ascii")
 
     def get_initial_status(self):
         self.ser.write(b",ss*")
@@ -170,6 +257,7 @@ class Cybres_MU:
     def restart(self):
         time.sleep(1)
         self._get_response(sleep_time=0.5)
+        self._rx_buf.clear()
         self.ser.reset_input_buffer()
         self.ser.reset_output_buffer()
         self.ser.write(b",sr*")
@@ -180,6 +268,7 @@ class Cybres_MU:
     def stop_measurement(self):
         time.sleep(1)
         self._get_response(sleep_time=0.5)
+        self._rx_buf.clear()
         self.ser.reset_input_buffer()
         self.ser.reset_output_buffer()
         self.ser.write(b",mp*")
@@ -188,26 +277,26 @@ class Cybres_MU:
         self.data_watchdog.update_limit(interval / 1000)
         self.frame_watchdog.update_limit(interval / 1000)
 
-        self.ser.write(f",mi{interval:05}*".encode())
+        self.ser.write(_MI_CMD % interval)
         return self._get_response(sleep_time=0.5)
 
     def set_waveform_amplitude(self, amplitude):
         if amplitude < 1 or amplitude > 127:
             raise ValueError(f"Impedance Waveform Amplitude must be 1-127. Current: {amplitude}")
 
-        self.ser.write(f",ya{amplitude:03}*".encode())
+        self.ser.write(_YA_CMD % amplitude)
         return self._get_response(sleep_time=0.5)
 
     def set_waveform_range(self, range: WaveformRange):
-        self.ser.write(f",yy{range.value}*".encode())
+        self.ser.write(_YY_CMD % range.value)
         return self._get_response(sleep_time=0.5)
 
     def set_tia_amplification(self, gain: TIAAmplification):
-        self.ser.write(f",y1{gain.value}*".encode())
+        self.ser.write(_Y1_CMD % gain.value)
         return self._get_response(sleep_time=0.5)
 
     def set_measurement_mode(self, mode: MeasurementMode):
-        self.ser.write(f",yn{mode.value}*".encode())
+        self.ser.write(_YN_CMD % mode.value)
         return self._get_response(sleep_time=0.5)
 
     def to_flash(self):
@@ -231,35 +320,21 @@ class Cybres_MU:
 
     def _get_response(self, sleep_time=0.1):
         time.sleep(sleep_time)
-        response = ""
-        while self.ser.in_waiting:
-            response += self.ser.read(1).decode("ascii")
-        return response
+        # Include anything the bulk reader already pulled off the port.
+        response = bytearray(self._rx_buf)
+        self._rx_buf.clear()
+        ser = self.ser
+        while ser.in_waiting:
+            response += ser.read(ser.in_waiting)
+        return response.decode("ascii")
 
     @staticmethod
     def parse_status_message(msg):
         if msg[0] != "I" or msg[-1] != "Y":
             raise ValueError("Invalid status message format.")
-        msg = msg[1:-1]
-
-        # Initialize variables
-        raw = {}
+        # Extract all key/value pairs in a single pass of the regex engine.
+        raw = {key: int(value) for key, value in _STATUS_RE.findall(msg[1:-1])}
         processed = {}
-        key = None
-        value = ""
-
-        for char in msg:
-            if char.isdigit():
-                value += char  # If the character is a digit, add it to the value
-            else:
-                if key is not None and value:
-                    raw[key] = int(value)  # Assign the accumulated value to the previous key
-                key = char  # The current character is the new key
-                value = ""  # Reset the value accumulator
-
-        # Add the last key-value pair
-        if key is not None and value:
-            raw[key] = int(value)
 
         for key, value in Cybres_MU.config_dict.items():
             config_value = raw[key]
@@ -291,10 +366,10 @@ def test_mu():
 
 
 def test_watchdog():
-    watchdog = WatchdogCounter(3, 1)
+    watchdog = WatchdogCounter(3, 1, target=r".+")
     while True:
         c = input("> ")
-        print(watchdog.check(c, r".+"))
+        print(watchdog.check(c))
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import sys
 import socket
+import signal
 import logging
 import argparse
 import serial
@@ -54,6 +55,13 @@ if __name__ == "__main__":
     setup_logger(hostname, level=logging.DEBUG if args.debug else logging.INFO)
     logging.info(f"Starting sensor node with hostname: {hostname}")
 
+    def sigterm_handler(signum, frame):
+        # Reuse the Ctrl-C cleanup path so buffered csv data is flushed and
+        # the MU device is stopped when the process is terminated.
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, sigterm_handler)
+
     baud = args.baud
 
     connected = False
@@ -1,10 +1,16 @@
 #!/usr/bin/env python3
+import os
+import re
 import json
 import time
+import queue
 import logging
 import datetime
+import threading
 from pathlib import Path
 
+import numpy as np
+
 from cybres_mu import Cybres_MU
 
 # from Additional_Sensors.rgbtcs34725 import RGB_TCS34725
@@ -14,6 +20,19 @@ from mu_interface.Utilities.data2csv import CsvStorage
 from mu_interface.Utilities.utils import TimeFormat
 from mu_interface.Utilities.HTTP_client import HTTPClient
 
+# Key/value lines of the MU data header, e.g. "#id 123".
+_HEADER_RE = re.compile(r"#(\w+)\s+(\S+)")
+
+# Use orjson for the config dumps when it is available; fall back to stdlib.
+try:
+    import orjson
+
+    def _json_dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj, indent=4)
+
 
 class Sensor_Node:
     def __init__(self, hostname, port, baudrate, meas_interval, address, file_path, file_prefix):
@@ -25,8 +44,13 @@ class Sensor_Node:
         self.measurment_interval = meas_interval
         self.file_path = file_path  # e.g. /home/rockpi/measurements/OB-ZAG-0_2/MU/CYB1
         self.file_prefix = file_prefix  # e.g. rockpi_1_ACM0, OB-ZAG-0_2_CYB1
-        self.device = file_prefix.split("_")[-1]  # e.g. ACM0, CYB1
+        self.device = file_prefix.rsplit("_", 1)[-1]  # e.g. ACM0, CYB1
         self.csv_object = None
+        # Rows are queued here and written by a background thread so disk
+        # latency never stalls the acquisition loop.
+        self._csv_queue = queue.Queue(maxsize=100)
+        self._csv_thread = threading.Thread(target=self._csv_writer_loop, daemon=True)
+        self._csv_error = threading.Event()
         self.msg_count = 0
         self.start_time = None
         self.mu_id = 0
@@ -41,6 +65,8 @@ class Sensor_Node:
         # e.g. ['ozon-conc', 'intensity-red', 'intensity-blue']
         # self.rgb = RGB_TCS34725()
         self.additionalSensors = []  # ['light-red', 'light-green', 'light-blue', 'color-temperature', 'light-intensity']
+        # Invariant over the whole run, so evaluate it once instead of per frame.
+        self._has_extra = bool(self.additionalSensors)
 
     def check(self):
         """
@@ -64,7 +90,9 @@ class Sensor_Node:
             self.mu_config['meas. config'] = response_lines[4].split('=> ')[-1].rstrip('.')
             if output:
                 logging.info(f"Blue box configuration:\n{Cybres_MU.print_config_dict(self.mu_config)}")
-            logging.debug(json.dumps(mu_config_raw, indent=4))
+            # Only serialize the raw config when DEBUG is actually enabled.
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug(_json_dumps(mu_config_raw))
         except (IndexError, ValueError) as e:
             logging.warning(f"Could not parse the initial status message.\n{e}")
 
@@ -96,6 +124,16 @@ class Sensor_Node:
         """
         Start the measurements. Continue to publish over MQTT and store to csv.
         """
+        # Optionally pin the acquisition process to one core to reduce
+        # scheduling jitter on multicore boards. Opt-in via SENSOR_CPU.
+        cpu = os.environ.get("SENSOR_CPU")
+        if cpu is not None and hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(0, {int(cpu)})
+                logging.info("Pinned measurement process to CPU %s.", cpu)
+            except (ValueError, OSError) as e:
+                logging.warning(f"Could not pin process to CPU {cpu}: {e}")
+
         # Configure the MU device.
         self.get_config()
         self.configure()
@@ -118,22 +156,28 @@ class Sensor_Node:
         # Create the file for storing measurement data.
         file_name = f"{self.file_prefix}_{self.start_time.strftime(TimeFormat.file)}.csv"
         self.csv_object = CsvStorage(self.file_path, file_name, self.additionalSensors)
-        last_time = datetime.datetime.now()
-
-        # Measure the average time between measurements.
-        time_length = 100
-        loop = {"start": time.time(), "duration": [0] * time_length}
-        processing = {"start": time.time(), "duration": [0] * time_length}
+        if not self._csv_thread.is_alive():
+            self._csv_thread.start()
+        next_rotation = self._next_rotation_time()
+
+        # Measure the average time between measurements with an exponential
+        # moving average: O(1) state instead of a 100-element window.
+        log_interval = 100
+        loop = {"start": time.monotonic(), "avg": 0.0}
+        processing = {"start": time.monotonic(), "avg": 0.0}
         time_index = 0
 
         while True:
-            # Create a new csv file after the specified interval.
-            current_time = datetime.datetime.now()
-            if current_time.hour in {0, 12} and current_time.hour != last_time.hour:
+            # Create a new csv file after the specified interval. The next
+            # rotation time is precomputed so the check is one float compare.
+            if time.time() >= next_rotation:
                 logging.info("Creating a new csv file.")
-                file_name = f"{self.file_prefix}_{current_time.strftime(TimeFormat.file)}.csv"
+                # Let the writer thread close the old file after it has
+                # drained all rows still queued for it.
+                self._csv_queue.put((self.csv_object, None, None))
+                file_name = f"{self.file_prefix}_{datetime.datetime.now().strftime(TimeFormat.file)}.csv"
                 self.csv_object = CsvStorage(self.file_path, file_name, self.additionalSensors)
-                last_time = current_time
+                next_rotation = self._next_rotation_time()
 
             # Get the next data line.
             try:
@@ -143,9 +187,10 @@ class Sensor_Node:
                 self.notify_pub.publish("[Error]: No data received from Blue box.", topic="timeout_error")
                 continue
 
-            loop["duration"][time_index] = time.time() - loop["start"]
-            loop["start"] = time.time()
-            processing["start"] = time.time()
+            now = time.monotonic()
+            loop["avg"] = 0.95 * loop["avg"] + 0.05 * (now - loop["start"])
+            loop["start"] = now
+            processing["start"] = now
             mu_header, mu_payload = self.classify_message(next_line)
 
             # Send data to Edge device via ZMQ if it's valid.
@@ -160,17 +205,31 @@ class Sensor_Node:
                 try:
                     timestamp = datetime.datetime.fromtimestamp(mu_payload[3])
                     data_line, data_dict, wrong_values = self.csv_object.transform_data(mu_payload)
-                    self.csv_object.write(timestamp.strftime(TimeFormat.data), data_line)
+                    # %-interpolation writes TimeFormat.data several times
+                    # faster than strftime's format machinery.
+                    timestamp_str = "%04d-%02d-%02d %02d:%02d:%02d:%06d" % (
+                        timestamp.year, timestamp.month, timestamp.day,
+                        timestamp.hour, timestamp.minute, timestamp.second, timestamp.microsecond,
+                    )
+                    self._csv_queue.put_nowait((self.csv_object, timestamp_str, data_line))
 
                     if wrong_values:
                         warning = f"[Warning] Unexpected values for:\n{self.device}\n{wrong_values}"
                         self.notify_pub.publish(warning, topic="value_out_of_range")
 
+                except queue.Full:
+                    logging.error("Csv writer queue is full. The writer thread is stuck or too slow.")
+                    self.notify_pub.publish("[Error]: Writing data to CSV file failed. Fix ASAP!", topic="csv_error")
                 except Exception as e:
                     logging.error(f"Writing to csv file failed with error:\n{e}\n\n"
                                   f"Continuing because this is not a fatal error.")
                     self.notify_pub.publish("[Error]: Writing data to CSV file failed. Fix ASAP!", topic="csv_error")
 
+                # Report write errors raised inside the writer thread.
+                if self._csv_error.is_set():
+                    self._csv_error.clear()
+                    self.notify_pub.publish("[Error]: Writing data to CSV file failed. Fix ASAP!", topic="csv_error")
+
                 # Cloud part
                 try:
                     fail_rate = self.http_client.send(timestamp, data_dict)
@@ -193,11 +252,11 @@ class Sensor_Node:
                                             topic="website_error")
 
             # Record the time taken to process the data.
-            processing["duration"][time_index] = time.time() - processing["start"]
+            processing["avg"] = 0.95 * processing["avg"] + 0.05 * (time.monotonic() - processing["start"])
             time_index += 1
-            if time_index == time_length:
-                logging.debug("Average loop time: %f", sum(loop["duration"]) / time_length)
-                logging.debug("Average processing time: %f", sum(processing["duration"]) / time_length)
+            if time_index == log_interval:
+                if logging.getLogger().isEnabledFor(logging.DEBUG):
+                    logging.debug("Average loop time: %f, processing time: %f", loop["avg"], processing["avg"])
                 time_index = 0
 
             # Print out a status message roughly every 30 mins
@@ -207,6 +266,40 @@ class Sensor_Node:
                 duration = f"{td.days} days, {hms[0] :02}:{hms[1] :02}:{hms[2] :02} [HH:MM:SS]"
                 logging.info("I am measuring for %s and I collected %d datapoints.", duration, self.msg_count)
 
+    @staticmethod
+    def _next_rotation_time():
+        """
+        Return the unix time of the next 0:00 or 12:00 local-time boundary.
+        """
+        now = datetime.datetime.now()
+        boundary = now.replace(minute=0, second=0, microsecond=0)
+        if now.hour < 12:
+            boundary = boundary.replace(hour=12)
+        else:
+            boundary = boundary.replace(hour=0) + datetime.timedelta(days=1)
+        return boundary.timestamp()
+
+    def _csv_writer_loop(self):
+        """
+        Write queued rows to the csv file in the background.
+        """
+        while True:
+            item = self._csv_queue.get()
+            try:
+                if item is None:  # Gracefully stop the thread if None is received.
+                    break
+                csv_object, timestamp, data_line = item
+                if timestamp is None:  # Rotation: close the drained file.
+                    csv_object.close()
+                else:
+                    csv_object.write(timestamp, data_line)
+            except Exception as e:
+                logging.error(f"Writing to csv file failed with error:\n{e}\n\n"
+                              f"Continuing because this is not a fatal error.")
+                self._csv_error.set()
+            finally:
+                self._csv_queue.task_done()
+
     def classify_message(self, mu_line):
         """
         Determines the message type.
@@ -217,48 +310,50 @@ class Sensor_Node:
         Returns:
             A tuple containing a header and payload for the MQTT message.
         """
-        logging.debug(mu_line)
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(mu_line)
         try:
-            counter = mu_line.count("#")
+            # Split once and dispatch on the number of parts instead of
+            # re-scanning the line with count() and a second split().
+            messages = mu_line.split("#")
+            counter = len(messages) - 1
             if counter == 0:
                 # Line is pure data message.
                 messagetype = 1
                 timestamp, measurements = self.transform_data(mu_line)
                 # ID and MM are manually added.
-                payload = [self.hostname, self.mu_mm, self.mu_id, timestamp] + measurements
+                payload = [self.hostname, self.mu_mm, self.mu_id, timestamp, *measurements]
 
             elif counter == 2:
                 # Line is data message/id/measurement mode.
                 # Every 100 measurements the MU sends also its own ID and measurement mode.
                 messagetype = 2
-                messages = mu_line.split("#")
                 mu_id = int(messages[1].split(" ")[1])
                 mu_mm = int(messages[2].split(" ")[1])
                 timestamp, measurements = self.transform_data(messages[0])
                 # ID and MM are manually added.
-                payload = [self.hostname, mu_mm, mu_id, timestamp] + measurements
+                payload = [self.hostname, mu_mm, mu_id, timestamp, *measurements]
 
             elif counter == 4:
                 # Line is header
                 messagetype = 0
                 payload = mu_line
                 # ID and MM are saved from the header
-                lines = [line.split() for line in mu_line.split("\r\n") if line.startswith("#")]
-                lines = {line[0]: line[1] for line in lines}
-                self.mu_id = int(lines['#id'])
-                self.mu_mm = int(lines['#ta'])
+                lines = dict(_HEADER_RE.findall(mu_line))
+                self.mu_id = int(lines['id'])
+                self.mu_mm = int(lines['ta'])
 
             else:
                 logging.warning("Unknown data type: \n%s", mu_line)
                 return None, []
 
-        except (ValueError, IndexError, KeyError) as e:
+        except (ValueError, IndexError, KeyError, OverflowError) as e:
             logging.error("Error while parsing the data: %s", e)
             logging.error("Data: %s", mu_line)
             return None, []
 
         # Add data from additional external sensors
-        if self.additionalSensors and messagetype in {1, 2}:
+        if self._has_extra and messagetype in (1, 2):
             # Call here a get_data() method, e.g.:
             # additionalValues = [getOzonValues(), getRGBValues()]
             # Important: len(self.sensors) == len(additionalValues), otherwise
@@ -266,7 +361,7 @@ class Sensor_Node:
             additionalValues = []  # self.rgb.getData()#[]
             payload = payload + additionalValues
 
-        header = (self.hostname, messagetype, bool(self.additionalSensors))
+        header = (self.hostname, messagetype, self._has_extra)
         return header, payload
 
     def transform_data(self, string_data):
@@ -280,8 +375,11 @@ class Sensor_Node:
             A list containing the MU data.
         """
         split_data = string_data.split(" ")
-        timestamp = int(time.mktime(datetime.datetime.now().timetuple()))
-        measurements = [int(elem) for elem in split_data[1:]]
+        timestamp = int(time.time())
+        # numpy converts the whole row in C instead of one int() call per
+        # element. int64 leaves room for 32-bit error sentinels like
+        # 0xFFFFFFFF that some registers report.
+        measurements = np.array(split_data[1:], dtype=np.int64).tolist()
         return timestamp, measurements
 
     def stop(self):
@@ -305,5 +403,10 @@ class Sensor_Node:
         self.mu.ser.close()
         self.pub.socket.close()
         self.pub.context.term()
+        if self._csv_thread.is_alive():
+            self._csv_queue.put(None)
+            self._csv_thread.join()
+        if self.csv_object:
+            self.csv_object.close()
         if self.http_client:
             self.http_client.stop()
@@ -8,14 +8,25 @@ class ZMQ_Publisher_Throttled():
     def __init__(self, min_time=3*60*60):
         self.context = zmq.Context()
         self.socket = self.context.socket(zmq.PUB)
+        # Keep at most one pending notification and never block the caller:
+        # a slow or dead subscriber must not stall the measurement loop.
+        self.socket.setsockopt(zmq.SNDHWM, 1)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.setsockopt(zmq.IMMEDIATE, 1)
         self.socket.connect("tcp://127.0.0.1:5556")
-        time.sleep(1)
 
         self.last_publish = dict()
         self.min_time = min_time
 
     def publish(self, message, topic="default"):
-        if self.last_publish.get(topic, None) is None or time.time() - self.last_publish[topic] > self.min_time:
-            self.last_publish[topic] = time.time()
-            self.socket.send_string(message)
+        # One clock read and one dict lookup on the common throttled path.
+        # monotonic keeps the throttle window immune to wall-clock changes.
+        now = time.monotonic()
+        if now - self.last_publish.get(topic, -self.min_time) > self.min_time:
+            self.last_publish[topic] = now
+            try:
+                self.socket.send_string(message, flags=zmq.NOBLOCK)
+            except zmq.Again:
+                logging.debug(f"Sensor node notifier - dropped message: {message} on topic: {topic}")
+                return
             logging.debug(f"Sensor node notifier - published message: {message} on topic: {topic}")
\ No newline at end of file
@@ -23,10 +23,12 @@ class ZMQ_Publisher():
 
 
     # function for serializing and sending np arrays
-    def send_array(self, array, flags=0, copy=True, track=False):
+    def send_array(self, array, flags=0, copy=False, track=False):
         md = dict(
             dtype = str(array.dtype),
             shape = array.shape,
         )
         self.socket.send_json(md, flags|zmq.SNDMORE)
+        # copy=False hands the array buffer to zmq as a zero-copy frame;
+        # pyzmq keeps the buffer alive until the frame is actually sent.
         return self.socket.send(array, flags, copy=copy, track=track)
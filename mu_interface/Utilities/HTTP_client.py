@@ -2,18 +2,58 @@
 # -*- coding: utf-8 -*-
 # from datetime import datetime
 import datetime
+import fcntl
+import functools
+import gzip
 import json
 import logging
 import os
 import queue
 import threading
-from collections import deque
+import time
 from enum import Enum
+from pathlib import Path
 
 import requests
-import yaml
 from requests.adapters import HTTPAdapter, Retry
-from func_timeout import func_timeout, FunctionTimedOut
+
+# orjson parses large number-heavy payloads a few times faster than stdlib
+# json and works straight on the response bytes; fall back when missing.
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj):
+        return orjson.dumps(obj)
+except ImportError:
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps(obj):
+        return json.dumps(obj).encode()
+
+
+_log = logging.getLogger(__name__)
+
+# One adapter shared by every HTTPClient in the process: all clients talk to
+# the same API host, so sharing the pool lets them reuse each other's warm
+# TCP/TLS connections instead of each opening their own.
+# Retry only idempotent methods: a retried POST whose first attempt actually
+# reached the server would duplicate the measurement.
+_SHARED_ADAPTER = HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=50,
+    pool_block=True,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+    ),
+)
 
 
 class DateRange(Enum):
@@ -24,9 +64,29 @@ class DateRange(Enum):
 
 
 url = os.environ["WP_API_URL"]
-headers = {"Content-Type": "application/json", "Accept": "application/json", "Authorization": os.environ["WP_API_AUTH"]}
 SLOW_TIMEOUT = 7
 FAST_TIMEOUT = 5
+# Upload batching: at most this many samples per bulk request, and a sample
+# never waits longer than the flush interval before being sent.
+BATCH_MAX = 50
+FLUSH_INTERVAL = 5
+# How long the cached node/data-field lists are considered fresh.
+CACHE_TTL = 60
+# Bulk upload bodies above this size are gzipped before sending.
+GZIP_THRESHOLD = 2048
+
+_UTC = datetime.timezone.utc
+
+# Entries that could not be uploaded are spooled here as NDJSON and replayed
+# once the connection comes back, so an outage does not lose measurements.
+_OUTBOX_DIR = Path.home() / ".mu_interface" / "outbox"
+
+# The node and data-field lists are identical for every client in the
+# process, so the parsed results are shared. The lock also collapses the
+# boot-time burst where each MU client fetches the same list in turn.
+_list_cache_lock = threading.Lock()
+_nodes_cache = {"data": None, "handles": None, "etag": None, "t": 0.0}
+_fields_cache = {"data": None, "handles": None, "etag": None, "t": 0.0}
 
 
 website_mapping = {
@@ -45,6 +105,15 @@ website_mapping = {
 class HTTPClient(object):
     timestamp_format = "%Y-%m-%d %H:%M:%S"
 
+    def __new__(cls, node_handle, *args, **kwargs):
+        # Orange boxes that are not on the website get the disabled subclass
+        # whose methods are plain no-ops. This replaces the old
+        # __getattribute__ hook, which allocated a fresh wrapper closure on
+        # every single method access, including the per-sample send().
+        if cls is HTTPClient and node_handle.startswith("OB") and node_handle not in website_mapping:
+            return object.__new__(_DisabledHTTPClient)
+        return object.__new__(cls)
+
     def __init__(self, node_handle, display_name=None, timeout=2) -> None:
         self.node_handle = node_handle
         self.display_name = website_mapping.get(node_handle, display_name or node_handle)
@@ -54,16 +123,19 @@ class HTTPClient(object):
             self.enabled = False
             return
 
-        self.session = requests.Session()
-        retries = Retry(total=3, backoff_factor=0.5)
-        self.session.mount("http://", HTTPAdapter(max_retries=retries))
-        self.session.mount("https://", HTTPAdapter(max_retries=retries))
+        self.session = self._build_session()
         self.fast_timeout = min(timeout, FAST_TIMEOUT)
+        # Prepared once: add_data only swaps the body per call, skipping the
+        # URL parsing and header merging Session.post redoes on every request.
+        self._sensordata_template = self.session.prepare_request(requests.Request("POST", url + "sensordata"))
+        self._outbox = _OUTBOX_DIR / f"{node_handle}.ndjson"
 
         self.known_data_fields = None
         self.known_nodes = None
-        # Count how many times the last 10 data additions were successful.
-        self.success_tracker = deque([True] * 10, maxlen=10)
+        # 10-bit ring of the last data-addition outcomes (1 = success).
+        # An int bitmap makes the fail rate a popcount instead of a scan.
+        self._success_bits = (1 << 10) - 1
+        self._success_idx = 0
 
         try:
             self.register_node()
@@ -72,51 +144,62 @@ class HTTPClient(object):
                             f"I will try to pretend node is already registerd, but this might trow error later.e"
                             f"Full error: {e}")
 
-        # Separate thread for adding data.
-        self.queue = queue.Queue(maxsize=10)
-        self._stop_event = threading.Event()
-        self.thread = threading.Thread(target=self._data_processing_thread, daemon=True)
+        # Uploads run on the worker shared by all clients in the process.
         self.thread_started = False
 
-    def __getattribute__(self, name):
-        """
-        Oh, this is such a hacky way to silently ignore method calls.
-
-        I use it because I want to distribute the same code to all orange
-        boxes and run for all connected MU devices, but I don't want all of them
-        to send data to the website. I don't want to add if statements to every
-        method call, so I just disable the whole thing automatically.
-        """
-        attr = object.__getattribute__(self, name)
-
-        # If the accessed attribute is a method, we need to check 'enabled'
-        if callable(attr) and name != "__init__":
-            def wrapper(*args, **kwargs):
-                # Only call the method if 'enabled' is True
-                if self.enabled:
-                    return attr(*args, **kwargs)
-                logging.debug(f"Attempted to call HTTPClient method '{name}'. Method is disabled.")
-            return wrapper
-        return attr
+    @staticmethod
+    def _build_session():
+        """Create the pooled session. Override to supply another transport."""
+        session = requests.Session()
+        # Set the headers once on the session instead of per request. The
+        # auth token is read once per client rather than at import time.
+        session.headers.update({
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Authorization": os.environ["WP_API_AUTH"],
+        })
+        # The boxes talk to the API directly; skipping the environment
+        # proxy/netrc lookup removes per-request os.environ scans.
+        session.trust_env = False
+        session.mount("http://", _SHARED_ADAPTER)
+        session.mount("https://", _SHARED_ADAPTER)
+        return session
 
     def get_nodes(self):
         """Get the list of nodes currently on the website."""
         query = "nodes"
+        with _list_cache_lock:
+            if _nodes_cache["data"] is not None and time.monotonic() - _nodes_cache["t"] < CACHE_TTL:
+                self.known_nodes = _nodes_cache["handles"]
+                return _nodes_cache["data"]
+            req_headers = {"If-None-Match": _nodes_cache["etag"]} if _nodes_cache["etag"] else None
 
-        try:
-            response = self.session.get(url + query, headers=headers, timeout=SLOW_TIMEOUT)
-            logging.debug(response.text)
-        except (requests.exceptions.Timeout, FunctionTimedOut):
-            logging.error("Timeout while getting the list of nodes from the website.")
-            return None
-
-        if not response.ok:
-            logging.error(f"Failed to get existing nodes from the website. Status code {response.status_code}")
-            return None
-
-        parsed = json.loads(response.text)
-        self.known_nodes = [x["handle"] for x in parsed["data"]]
-        return parsed["data"]
+            try:
+                response = self.session.get(url + query, headers=req_headers, timeout=SLOW_TIMEOUT)
+                if _log.isEnabledFor(logging.DEBUG):
+                    _log.debug(response.text)
+            except requests.exceptions.Timeout:
+                logging.error("Timeout while getting the list of nodes from the website.")
+                return None
+
+            if response.status_code == 304:
+                # List unchanged on the server; skip the parse and reuse the cache.
+                _nodes_cache["t"] = time.monotonic()
+                self.known_nodes = _nodes_cache["handles"]
+                return _nodes_cache["data"]
+
+            if not response.ok:
+                logging.error(f"Failed to get existing nodes from the website. Status code {response.status_code}")
+                return None
+
+            parsed = _json_loads(response.content)
+            # frozenset gives O(1) membership checks in node_exists.
+            _nodes_cache["data"] = parsed["data"]
+            _nodes_cache["handles"] = frozenset(x["handle"] for x in parsed["data"])
+            _nodes_cache["etag"] = response.headers.get("ETag")
+            _nodes_cache["t"] = time.monotonic()
+            self.known_nodes = _nodes_cache["handles"]
+            return parsed["data"]
 
     def node_exists(self, node_handle=None, force_refresh=False):
         """
@@ -131,8 +214,11 @@ class HTTPClient(object):
         if node_handle is None:
             node_handle = self.node_handle
 
-        if self.known_nodes is None or force_refresh:
-            self.get_nodes()
+        if force_refresh:
+            with _list_cache_lock:
+                _nodes_cache["t"] = 0.0
+        # Cheap when the shared cache is fresh: get_nodes returns without I/O.
+        self.get_nodes()
 
         if self.known_nodes is None:
             logging.error("Could not get list of nodes from the website.")
@@ -162,9 +248,10 @@ class HTTPClient(object):
 
         response = None
         try:
-            response = requests.request("POST", url + query, json=payload, headers=headers, timeout=SLOW_TIMEOUT)
-            logging.debug(response.text)
-        except (requests.exceptions.Timeout, FunctionTimedOut):
+            response = self.session.post(url + query, data=_json_dumps(payload), timeout=SLOW_TIMEOUT)
+            if _log.isEnabledFor(logging.DEBUG):
+                _log.debug(response.text)
+        except requests.exceptions.Timeout:
             logging.error(f"Timeout while waiting to add node {node_handle} to the website.")
             return False
 
@@ -172,14 +259,15 @@ class HTTPClient(object):
             logging.error(f"Failed to add node {node_handle} to the website. Status code {response.status_code}")
             return False
 
+        # The shared node list no longer matches the server.
+        with _list_cache_lock:
+            _nodes_cache["t"] = 0.0
+
         return True
 
     def register_node(self):
         """Add a node with parameters specified in the constructor."""
-        try:
-            func_timeout(SLOW_TIMEOUT, self.add_node, args=(self.node_handle, self.display_name))
-        except FunctionTimedOut:
-            logging.error("func_timeout had to terminate the add_node or some downstream function.")
+        self.add_node(self.node_handle, self.display_name)
 
     def delete_node(self, node_handle):
         """
@@ -195,8 +283,9 @@ class HTTPClient(object):
         payload = {"handle": node_handle}
 
         try:
-            response = self.session.post(url + query, json=payload, headers=headers, timeout=SLOW_TIMEOUT)
-            logging.debug(response.text)
+            response = self.session.post(url + query, data=_json_dumps(payload), timeout=SLOW_TIMEOUT)
+            if _log.isEnabledFor(logging.DEBUG):
+                _log.debug(response.text)
         except requests.exceptions.Timeout:
             logging.error(f"Timeout while waiting to delete node {node_handle} from the website.")
             return False
@@ -205,26 +294,43 @@ class HTTPClient(object):
             logging.error(f"Failed to delete node {node_handle} from the website. Status code {response.status_code}")
             return False
 
+        with _list_cache_lock:
+            _nodes_cache["t"] = 0.0
+
         return True
 
     def get_data_fields(self):
         """Return all available data fields on the website."""
         query = "data-field"
-        response = None
-        try:
-            response = self.session.get(url + query, headers=headers, timeout=SLOW_TIMEOUT)
-            logging.debug(response.text)
-        except requests.exceptions.Timeout:
-            logging.error("Timeout while waiting for the current list of data fields from the website.")
-            return None
-
-        if not response.ok:
-            logging.error(f"Failed to get existing data fields from the website. Status code {response.status_code}")
-            return None
-
-        parsed = json.loads(response.text)
-        self.known_data_fields = [x["handle"] for x in parsed["data"]]
-        return parsed["data"]
+        with _list_cache_lock:
+            if _fields_cache["data"] is not None and time.monotonic() - _fields_cache["t"] < CACHE_TTL:
+                self.known_data_fields = _fields_cache["handles"]
+                return _fields_cache["data"]
+            req_headers = {"If-None-Match": _fields_cache["etag"]} if _fields_cache["etag"] else None
+            try:
+                response = self.session.get(url + query, headers=req_headers, timeout=SLOW_TIMEOUT)
+                if _log.isEnabledFor(logging.DEBUG):
+                    _log.debug(response.text)
+            except requests.exceptions.Timeout:
+                logging.error("Timeout while waiting for the current list of data fields from the website.")
+                return None
+
+            if response.status_code == 304:
+                _fields_cache["t"] = time.monotonic()
+                self.known_data_fields = _fields_cache["handles"]
+                return _fields_cache["data"]
+
+            if not response.ok:
+                logging.error(f"Failed to get existing data fields from the website. Status code {response.status_code}")
+                return None
+
+            parsed = _json_loads(response.content)
+            _fields_cache["data"] = parsed["data"]
+            _fields_cache["handles"] = frozenset(x["handle"] for x in parsed["data"])
+            _fields_cache["etag"] = response.headers.get("ETag")
+            _fields_cache["t"] = time.monotonic()
+            self.known_data_fields = _fields_cache["handles"]
+            return parsed["data"]
 
     def add_data_field(self, field_handle, field_name, unit):
         """
@@ -242,8 +348,9 @@ class HTTPClient(object):
         payload = {"name": field_name, "handle": field_handle, "unit": unit}
 
         try:
-            response = self.session.post(url + query, json=payload, headers=headers, timeout=SLOW_TIMEOUT)
-            logging.debug(response.text)
+            response = self.session.post(url + query, data=_json_dumps(payload), timeout=SLOW_TIMEOUT)
+            if _log.isEnabledFor(logging.DEBUG):
+                _log.debug(response.text)
         except requests.exceptions.Timeout:
             logging.error(f"Timeout while waiting to add data field {field_handle} to the website.")
             return False
@@ -252,6 +359,9 @@ class HTTPClient(object):
             logging.error(f"Failed to add data field {field_handle} to the website. Status code {response.status_code}")
             return False
 
+        with _list_cache_lock:
+            _fields_cache["t"] = 0.0
+
         return True
 
     def delete_data_field(self, field_handle):
@@ -268,8 +378,9 @@ class HTTPClient(object):
         payload = {"handle": field_handle}
 
         try:
-            response = self.session.post(url + query, json=payload, headers=headers, timeout=SLOW_TIMEOUT)
-            logging.debug(response.text)
+            response = self.session.post(url + query, data=_json_dumps(payload), timeout=SLOW_TIMEOUT)
+            if _log.isEnabledFor(logging.DEBUG):
+                _log.debug(response.text)
         except requests.exceptions.Timeout:
             logging.error(f"Timeout while waiting to delete data field {field_handle} from the website.")
             return False
@@ -278,6 +389,9 @@ class HTTPClient(object):
             logging.error(f"Failed to delete field {field_handle} from the website. Status code {response.status_code}")
             return False
 
+        with _list_cache_lock:
+            _fields_cache["t"] = 0.0
+
         return True
 
     def get_data(self, date_range: DateRange, node_handles=None):
@@ -308,8 +422,9 @@ class HTTPClient(object):
         payload = {"node_handles": node_handles, "date_range": date_range.value}
 
         try:
-            response = self.session.post(f"{url}{query}", json=payload, headers=headers, timeout=SLOW_TIMEOUT)
-            logging.debug(response.text)
+            response = self.session.post(f"{url}{query}", data=_json_dumps(payload), timeout=SLOW_TIMEOUT)
+            if _log.isEnabledFor(logging.DEBUG):
+                _log.debug(response.text)
         except requests.exceptions.Timeout:
             logging.error("Timeout while waiting to retrieve data from the website.")
             return False
@@ -318,10 +433,10 @@ class HTTPClient(object):
             logging.error(f"Failed to retrieve data from the website. Status code {response.status_code}")
             return False
 
-        parsed = json.loads(response.text)
+        parsed = _json_loads(response.content)
         return parsed["data"]
 
-    def add_data(self, timestamp, data, node_handle=None):
+    def add_data(self, timestamp, data, node_handle=None, spool=True):
         """
         Add a single measurement set to the website.
 
@@ -329,6 +444,7 @@ class HTTPClient(object):
             timestamp (datetime or str): UTC timestamp of the data in "%Y-%m-%d %H:%M:%S" format.
             data (dict): Dictionary with the data to be added.
             node_handle (str): Node that collected the data. If None, it assumes itself as collector.
+            spool (bool): Whether to save the entry to the outbox if the request fails.
 
         Returns:
             True if a successful response is received, False otherwise.
@@ -340,88 +456,319 @@ class HTTPClient(object):
             timestamp = self.validate_timestamp(timestamp)
         except ValueError as e:
             logging.error(e)
-            self.success_tracker.append(False)
+            self._track_success(False)
             return False
 
-        query = "sensordata"
         payload = {"node_handle": node_handle, "data": data, "date": timestamp}
 
+        req = self._sensordata_template.copy()
+        req.body = _json_dumps(payload)
+        req.headers["Content-Length"] = str(len(req.body))
+
         try:
-            response = self.session.post(url + query, json=payload, headers=headers, timeout=self.fast_timeout)
-        except (
-            requests.exceptions.Timeout,
-            requests.exceptions.ConnectionError,
-            requests.exceptions.RequestException,
-            FunctionTimedOut,
-        ) as e:
+            response = self.session.send(req, timeout=(1, self.fast_timeout))
+        except requests.exceptions.RequestException as e:
             logging.error(f"Error while adding new data to the website: {e}")
-            self.success_tracker.append(False)
+            self._track_success(False)
+            if spool:
+                self._spool_entries([{"date": timestamp, "data": data}])
             return False
 
         if not response.ok:
             logging.error(f"Failed to add data to the website. Status code {response.status_code}")
-            self.success_tracker.append(False)
+            self._track_success(False)
             return False
 
-        self.success_tracker.append(True)
+        self._track_success(True)
         return True
 
-    def send(self, timestamp, data):
-        try:
-            self.queue.put_nowait((timestamp, data))
-        except queue.Full:
-            raise RuntimeError("HTTP client queue is full. This means the client is stuck.")
+    def add_data_bulk(self, rows, node_handle=None, spool=True):
+        """
+        Add multiple measurement sets to the website in a single request.
 
-        return self.success_tracker.count(False) / len(self.success_tracker)
+        Args:
+            rows (List[Tuple]): (timestamp, data dict) pairs, with timestamps
+                                in the same formats accepted by add_data.
+            node_handle (str): Node that collected the data. If None, it assumes itself as collector.
+            spool (bool): Whether to save the entries to the outbox if the request fails.
+
+        Returns:
+            True if a successful response is received, False otherwise.
+        """
+        if node_handle is None:
+            node_handle = self.node_handle
 
-    def _data_processing_thread(self):
-        while not self._stop_event.is_set():
+        entries = []
+        for timestamp, data in rows:
             try:
-                timestamp, data = self.queue.get()
-                if data is None:  # Gracefully stop the thread if None is received.
-                    break
-                func_timeout(SLOW_TIMEOUT, self.add_data, args=(timestamp, data))
-            except FunctionTimedOut:
-                logging.error("func_timeout had to terminate the add_data function.")
-            except Exception as e:
-                logging.error(
-                    f"Uncaught exception in _data_processing_thread: {e}\n"
-                    f"Continuing because this is not a fatal error."
-                )
-            finally:
-                self.queue.task_done()
+                entries.append({"date": self.validate_timestamp(timestamp), "data": data})
+            except ValueError as e:
+                logging.error(e)
+                self._track_success(False)
+
+        if not entries:
+            return False
+
+        query = "sensordata-bulk"
+        payload = {"node_handle": node_handle, "entries": entries}
+
+        body = _json_dumps(payload)
+        post_headers = None
+        if len(body) > GZIP_THRESHOLD:
+            # compresslevel=1 still shrinks the ASCII JSON several times over
+            # while keeping the compression cost negligible.
+            body = gzip.compress(body, compresslevel=1)
+            post_headers = {"Content-Encoding": "gzip"}
+
+        try:
+            response = self.session.post(url + query, data=body, headers=post_headers, timeout=(1, SLOW_TIMEOUT))
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error while adding bulk data to the website: {e}")
+            self._track_success(False)
+            if spool:
+                self._spool_entries(entries)
+            return False
+
+        if response.status_code == 404:
+            # Server without the bulk endpoint: fall back to one post per row.
+            # The caller's spool flag must carry over: the outbox replay calls
+            # this with spool=False while holding the outbox flock, and a
+            # spooling fallback would deadlock on that same lock.
+            return all([self.add_data(e["date"], e["data"], node_handle, spool=spool) for e in entries])
+
+        if not response.ok:
+            logging.error(f"Failed to add bulk data to the website. Status code {response.status_code}")
+            self._track_success(False)
+            return False
+
+        self._track_success(True)
+        return True
+
+    def _spool_entries(self, entries):
+        """Append unsent entries to the on-disk outbox, one JSON per line."""
+        try:
+            self._outbox.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._outbox, "ab") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.writelines(_json_dumps(entry) + b"\n" for entry in entries)
+        except OSError as e:
+            logging.error(f"Could not spool unsent data to {self._outbox}: {e}")
+
+    def _drain_outbox(self):
+        """Replay spooled entries; called after a successful upload."""
+        try:
+            if not self._outbox.exists() or self._outbox.stat().st_size == 0:
+                return
+            with open(self._outbox, "r+b") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                rows = []
+                for line in f:
+                    try:
+                        entry = _json_loads(line)
+                        rows.append((entry["date"], entry["data"]))
+                    except (ValueError, KeyError):
+                        continue
+                # spool=False: on failure the file is left as is and the next
+                # successful upload retries, instead of rewriting the entries.
+                if not rows or self.add_data_bulk(rows, spool=False):
+                    f.seek(0)
+                    f.truncate()
+        except OSError as e:
+            logging.error(f"Could not drain the outbox {self._outbox}: {e}")
+
+    def _track_success(self, ok):
+        """Record one data-addition outcome in the 10-slot ring."""
+        bit = 1 << self._success_idx
+        if ok:
+            self._success_bits |= bit
+        else:
+            self._success_bits &= ~bit
+        self._success_idx = (self._success_idx + 1) % 10
+
+    def send(self, timestamp, data):
+        _UPLOADER.submit(self, timestamp, data)
+        return (10 - bin(self._success_bits).count("1")) / 10
 
     def start(self):
-        self.thread.start()
+        _UPLOADER.register()
         self.thread_started = True
 
     def stop(self):
         if self.enabled and self.thread_started:
-            self._stop_event.set()
-            self.queue.put((None, None))
-            self.thread.join()
+            _UPLOADER.unregister()
             self.thread_started = False
 
     @staticmethod
     def validate_timestamp(timestamp):
         if isinstance(timestamp, datetime.datetime):
-            return timestamp.astimezone(datetime.timezone.utc).strftime(HTTPClient.timestamp_format)
+            dt = timestamp.astimezone(_UTC)
+            # Direct formatting is several times faster than strftime.
+            return "%04d-%02d-%02d %02d:%02d:%02d" % (dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second)
         elif isinstance(timestamp, str):
+            # The hot path passes datetimes, so the string case is rare
+            # enough for a full strptime, which also rejects impossible
+            # dates that a shape check would let through.
             datetime.datetime.strptime(timestamp, HTTPClient.timestamp_format)
             return timestamp
         else:
             raise ValueError("Timestamp must be either a datetime object or a string.")
 
 
+class _Uploader:
+    """
+    Upload worker shared by every HTTPClient in the process.
+
+    One thread draining one queue replaces a thread per client: fewer idle
+    threads on boxes running several MU devices, and samples from all
+    clients batch together into the same flush window.
+    """
+
+    # One batch of headroom: the outbox spool covers outages, and a deeper
+    # queue only accumulates stale timestamps and delays the fail-rate
+    # signal back to the sensor loop.
+    max_pending = BATCH_MAX
+
+    def __init__(self):
+        # SimpleQueue skips the Condition machinery of queue.Queue; with one
+        # producer call site and one consumer that lock traffic is pure cost.
+        # The bound is enforced in submit() since SimpleQueue has none.
+        self.queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._clients = 0
+
+    def register(self):
+        """Account for a client; start the worker on the first one."""
+        with self._lock:
+            self._clients += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def unregister(self):
+        """Account for a stopping client; join the worker after the last one."""
+        with self._lock:
+            self._clients -= 1
+            if self._clients <= 0 and self._thread is not None:
+                self.queue.put((None, None, None))
+                self._thread.join()
+                self._thread = None
+
+    def submit(self, client, timestamp, data):
+        if self.queue.qsize() >= self.max_pending:
+            # Drop the oldest entry instead of blocking or raising so a stuck
+            # uploader can never stall the sensor read loop. The drop counts
+            # as a failure in the owning client's fail rate.
+            try:
+                dropped = self.queue.get_nowait()
+            except queue.Empty:
+                dropped = None
+            if dropped is not None and dropped[0] is None:
+                # Never drop the stop sentinel; sacrifice the new sample.
+                self.queue.put_nowait(dropped)
+                client._track_success(False)
+                return
+            if dropped is not None:
+                dropped[0]._track_success(False)
+        self.queue.put_nowait((client, timestamp, data))
+
+    def _run(self):
+        while True:
+            # Block for the first sample, then drain whatever else arrives
+            # within the flush window so one request carries a whole batch.
+            client, timestamp, data = self.queue.get()
+            if client is None:  # Gracefully stop the thread if None is received.
+                break
+
+            items = [(client, timestamp, data)]
+            stop = False
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(items) < BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    client, timestamp, data = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if client is None:
+                    stop = True
+                    break
+                items.append((client, timestamp, data))
+
+            # Bulk uploads are per node, so group the batch by client.
+            batches = {}
+            for item_client, item_timestamp, item_data in items:
+                batches.setdefault(item_client, []).append((item_timestamp, item_data))
+
+            for item_client, rows in batches.items():
+                try:
+                    if len(rows) == 1:
+                        ok = item_client.add_data(*rows[0])
+                    else:
+                        ok = item_client.add_data_bulk(rows)
+                    if ok:
+                        # The connection works again; replay anything that
+                        # was spooled to disk during an outage.
+                        item_client._drain_outbox()
+                except Exception as e:
+                    logging.error(
+                        f"Uncaught exception in the upload worker: {e}\n"
+                        f"Continuing because this is not a fatal error."
+                    )
+
+            if stop:
+                break
+
+
+_UPLOADER = _Uploader()
+
+
+def _noop(self, *args, **kwargs):
+    logging.debug("HTTPClient is disabled. Ignoring method call.")
+
+
+class _DisabledHTTPClient(HTTPClient):
+    """
+    Client for orange boxes that must not send data to the website.
+
+    I use it because I want to distribute the same code to all orange
+    boxes and run for all connected MU devices, but I don't want all of them
+    to send data to the website. Every method that could touch the network
+    is a no-op, selected once in HTTPClient.__new__ instead of checking
+    'enabled' on every call.
+    """
+
+    get_nodes = node_exists = add_node = register_node = delete_node = _noop
+    get_data_fields = add_data_field = delete_data_field = get_data = _noop
+    add_data = add_data_bulk = send = start = stop = _noop
+
+
+@functools.lru_cache(maxsize=8)
+def _load_yaml(path_str, mtime):
+    """Parse a yaml file, memoized by path and mtime.
+
+    yaml.safe_load is pure Python and slow even for small files; the mtime
+    in the cache key makes edits to the file invalidate the cached parse.
+    """
+    # yaml is only needed here, so keep its import cost off the module import.
+    import yaml
+
+    with open(path_str, "r") as stream:
+        return yaml.safe_load(stream)
+
+
 def add_data_fields_from_yaml(client, yaml_file_path):
-    with open(yaml_file_path, "r") as stream:
-        try:
-            data_fields = yaml.safe_load(stream)
-            for field, settings in data_fields.items():
-                if settings["show"]:
-                    client.add_data_field(field, settings["name"], settings["unit"])
-        except yaml.YAMLError as exc:
-            print(exc)
+    try:
+        data_fields = _load_yaml(str(yaml_file_path), os.path.getmtime(yaml_file_path))
+        # One GET up front instead of blindly posting every field: only the
+        # fields the website does not know yet are added.
+        known = {field["handle"] for field in client.get_data_fields() or []}
+        for field, settings in data_fields.items():
+            if settings["show"] and field not in known:
+                client.add_data_field(field, settings["name"], settings["unit"])
+    except Exception as exc:
+        print(exc)
 
 
 def main():
@@ -441,6 +788,7 @@ def test():
     from pathlib import Path
 
     import pandas as pd
+    import yaml
 
     # Setup logging.
     setup_logger("TEST", level=logging.INFO)
@@ -494,12 +842,13 @@ def test():
     df = pd.read_csv(data_file, sep=",", header=0)
     df = df[keys]
 
+    rows = []
     for i in range(6):
         data_line = df.iloc[i]
         timestamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-        data = data_line.to_dict()
-        client.add_data(data, timestamp)
+        rows.append((timestamp, data_line.to_dict()))
         time.sleep(10)
+    client.add_data_bulk(rows)
 
     print(json.dumps(client.get_data(DateRange.LAST_HOUR), indent=2))
 
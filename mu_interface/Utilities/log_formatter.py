@@ -1,5 +1,8 @@
 import sys
+import atexit
+import queue
 import logging
+import logging.handlers
 import pathlib
 from datetime import datetime
 
@@ -20,15 +23,28 @@ log_DBGX = 15
 class ColoredFormatter(logging.Formatter):
     def __init__(self, fmt=None, datefmt=None):
         logging.Formatter.__init__(self, fmt, datefmt)
+        # One prebuilt format string per level folds the color codes into the
+        # substitution itself, so format() does a single %-pass per record
+        # instead of substitution plus three concatenations.
+        self._level_fmts = {
+            name: color + (fmt or "%(message)s") + RESET_SEQ for name, color in COLORS.items()
+        }
+
+    def formatMessage(self, record):
+        level_fmt = self._level_fmts.get(record.levelname)
+        if level_fmt is None:
+            return logging.Formatter.formatMessage(self, record)
+        return level_fmt % record.__dict__
 
     def format(self, record):
-        skip_line = False
-        if record.msg and record.msg[0] == '\n':
-            skip_line = True
-            record.msg = record.msg[1:]
+        msg = record.msg
+        skip_line = isinstance(msg, str) and msg.startswith('\n')
+        if skip_line:
+            record.msg = msg[1:]
         result = logging.Formatter.format(self, record)
-        result = COLORS[record.levelname] + result + RESET_SEQ
         if skip_line:
+            # Put the original message back; other handlers see this record too.
+            record.msg = msg
             result = '\n' + result
         return result
 
@@ -43,11 +59,22 @@ def setup_logger(name, level=logging.INFO):
 
     fileHandler = logging.FileHandler(f"logs/{name}-{datetime.now().strftime('%d_%m_%Y-%H_%M_%S')}.log")
     fileHandler.setFormatter(logFormatter)
-    rootLogger.addHandler(fileHandler)
 
     consoleHandler = logging.StreamHandler(sys.stdout)
     consoleHandler.setFormatter(colorFormatter)
-    rootLogger.addHandler(consoleHandler)
+
+    # Callers only enqueue the record; formatting and file/console writes
+    # happen on the listener thread, off the sensor loop.
+    log_queue = queue.SimpleQueue()
+    rootLogger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, fileHandler, consoleHandler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # The formats use neither process ids nor multiprocessing names, so skip
+    # collecting them for every record.
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
 
     rootLogger.setLevel(level)
 